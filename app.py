@@ -2,28 +2,71 @@
 # -*- coding: utf-8 -*-
 
 import os
+import asyncio
+import atexit
+import ctypes
+import errno
+import functools
+import gzip
+import hashlib
+import itertools
 import json
-import re
+import mmap
+import platform
+import queue
+import select
 import socket
+import struct
 import sys
 import time
 import logging
 import threading
 import webbrowser
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from flask import Flask, request, jsonify, Response
+import orjson
+from flask import Flask, request, Response
+from flask_compress import Compress
 from logging.handlers import RotatingFileHandler
 
-app = Flask(__name__)
+# Fixed for the life of the process
+IS_WINDOWS = sys.platform == 'win32'
+IS_FROZEN = getattr(sys, 'frozen', False)
+PLATFORM = platform.system()  # 'Windows', 'Darwin', 'Linux', ...
+
+try:
+    import winreg
+    _HAS_WINREG = True
+except ImportError:  # not Windows
+    _HAS_WINREG = False
+
+# The tray only exists on Windows. Elsewhere importing pystray would pick a
+# GUI backend at import (opening an X display, loading Gtk/AppKit) for nothing
+_HAS_PYSTRAY = False
+if IS_WINDOWS:
+    try:
+        import pystray
+        from PIL import Image, ImageDraw
+        _HAS_PYSTRAY = True
+    except Exception:
+        pass
 
 # Resolve paths for both normal and frozen (PyInstaller) modes
-if getattr(sys, 'frozen', False):
+if IS_FROZEN:
     BASE_DIR = os.path.dirname(sys.executable)
 else:
     BASE_DIR = os.path.dirname(__file__)
 
 DATA_FILE = os.path.join(BASE_DIR, 'devices.json')
 LOG_FILE = os.path.join(BASE_DIR, 'wol.log')
+# Bundled resources live in the PyInstaller extraction dir when frozen
+STATIC_DIR = os.path.join(getattr(sys, '_MEIPASS', BASE_DIR), 'static')
+INDEX_FILE = os.path.join(STATIC_DIR, 'index.html')
+
+app = Flask(__name__, static_folder=STATIC_DIR)
+# Transparently gzip/brotli larger API responses; index() serves its own
+# precompressed bytes and Flask-Compress skips already-encoded responses
+app.config['COMPRESS_MIMETYPES'] = ['text/html', 'application/json']
+app.config['COMPRESS_MIN_SIZE'] = 500
+Compress(app)
 
 # Setup logging
 def setup_logging():
@@ -34,11 +77,13 @@ def setup_logging():
     handler = RotatingFileHandler(LOG_FILE, maxBytes=5*1024*1024, backupCount=3, encoding='utf-8')
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
     handler.setFormatter(formatter)
+    handler.setLevel(logging.INFO)
     logger.addHandler(handler)
     
-    # Console handler
+    # Console handler (warnings only; per-request INFO lines go to wol.log)
     console = logging.StreamHandler()
     console.setFormatter(formatter)
+    console.setLevel(logging.WARNING)
     logger.addHandler(console)
     
     return logger
@@ -47,57 +92,313 @@ logger = setup_logging()
 
 # -------------------- Utils --------------------
 
-def ensure_data_file():
-    if not os.path.exists(DATA_FILE):
-        with open(DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
+# Accepted MAC separators (AA:BB:.., AA-BB-.., AABB.CCDD.EEFF) and hex digits
+_MAC_STRIP = str.maketrans('', '', ':-. ')
+_HEX = frozenset('0123456789abcdefABCDEF')
+
+
+def _json(obj, status=200):
+    """Serialize obj with orjson into a JSON response."""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+
+def _read_json():
+    """Parse the request body with orjson; {} if it is missing or not an object."""
+    try:
+        data = orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+# Process-wide device cache; devices.json is re-read only when its mtime
+# changes, writes are coalesced.
+_DEVICES = []
+_BY_MAC = {}
+_SEARCH_INDEX = []  # (device, lowercase "mac\0ip\0remark") pairs
+# GET /api/devices body as (json, gzipped or None, etag), built once per change
+_DEVICES_JSON = (b'[]', None, '')
+_LOCK = threading.RLock()
+_FLUSH_DELAY = 0.5  # seconds to wait for more changes before writing
+_FLUSH_RETRY_DELAY = 5.0  # seconds before retrying a failed write
+_flush_timer = None
+_mtime_ns = None  # st_mtime_ns of devices.json when the cache last matched it
+
+
+def _reindex():
+    """Rebuild the MAC and search indexes and the JSON body; caller must hold _LOCK.
+
+    New dicts are swapped in rather than mutated so lock-free readers on other
+    server threads never observe a half-built index.
+    """
+    global _BY_MAC, _SEARCH_INDEX, _DEVICES_JSON
+    body = orjson.dumps(_DEVICES)
+    # Same threshold as COMPRESS_MIN_SIZE; below it gzip doesn't pay off
+    gz = gzip.compress(body, 6) if len(body) >= 500 else None
+    _DEVICES_JSON = (body, gz, hashlib.sha1(body).hexdigest())
+    by_mac = {d.get('mac'): d for d in _DEVICES}
+    _SEARCH_INDEX = [
+        (d, '\0'.join(str(d.get(k, '')) for k in ('mac', 'ip', 'remark')).lower())
+        for d in _DEVICES
+    ]
+    _BY_MAC = by_mac
+
+
+def _sync_devices():
+    """Reload the cache if devices.json changed on disk (e.g. edited by hand).
+
+    Costs a single stat() when nothing changed. Unflushed local changes take
+    precedence over the file.
+    """
+    global _mtime_ns
+    try:
+        mtime = os.stat(DATA_FILE).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None  # no devices yet; the first save creates the file
+    if mtime == _mtime_ns:
+        return
+    with _LOCK:
+        if _flush_timer is not None or mtime == _mtime_ns:
+            return
+        try:
+            with open(DATA_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = []
+        except ValueError as e:  # JSONDecodeError, bad UTF-8
+            logger.error('devices.json 解析失败，按空列表处理: %s', e)
+            data = []
+        if not isinstance(data, list):
+            logger.error('devices.json 格式不正确（应为设备对象列表），按空列表处理')
+            data = []
+        # _reindex() keys on 'mac', so every entry must be an object with a str MAC
+        valid = [d for d in data if isinstance(d, dict) and isinstance(d.get('mac', ''), str)]
+        if len(valid) != len(data):
+            logger.error('devices.json 中有 %d 条记录格式不正确，已忽略', len(data) - len(valid))
+            data = valid
+        _DEVICES[:] = data
+        _reindex()
+        _mtime_ns = mtime
 
 
 def load_devices():
-    ensure_data_file()
-    with open(DATA_FILE, 'r', encoding='utf-8') as f:
+    """Return a shallow copy of the cached device list."""
+    _sync_devices()
+    with _LOCK:
+        return list(_DEVICES)
+
+
+def _write_devices(devices):
+    """Write devices to a temp file and atomically swap it into place."""
+    tmp = DATA_FILE + '.tmp'
+    with open(tmp, 'wb') as f:
+        # Indented so devices.json stays hand-editable (see README)
+        f.write(orjson.dumps(devices, option=orjson.OPT_INDENT_2))
+        f.flush()
+        os.fsync(f.fileno())  # never swap in a file whose data isn't on disk yet
+    os.replace(tmp, DATA_FILE)
+
+
+def flush_devices():
+    """Write the cache to disk now if a save is pending."""
+    global _flush_timer, _mtime_ns
+    with _LOCK:
+        if _flush_timer is None:
+            return
+        _flush_timer.cancel()
+        _flush_timer = None
         try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return []
+            _write_devices(_DEVICES)
+            _mtime_ns = os.stat(DATA_FILE).st_mtime_ns
+        except OSError as e:
+            # Stay dirty: retry later, and the exit-time flush tries again too
+            logger.error(f'保存设备列表失败，{_FLUSH_RETRY_DELAY:g} 秒后重试: {e}')
+            _start_flush_timer(_FLUSH_RETRY_DELAY)
+
+
+def _start_flush_timer(delay):
+    """Arm the flush timer; caller must hold _LOCK."""
+    global _flush_timer
+    _flush_timer = threading.Timer(delay, flush_devices)
+    _flush_timer.daemon = True
+    _flush_timer.start()
+
+
+def _mark_dirty():
+    """Schedule a coalesced write of the cache; caller must hold _LOCK."""
+    if _flush_timer is None:
+        _start_flush_timer(_FLUSH_DELAY)
 
 
 def save_devices(devices):
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(devices, f, ensure_ascii=False, indent=2)
+    """Update the cache and schedule devices.json to be rewritten."""
+    with _LOCK:
+        _DEVICES[:] = devices
+        _reindex()
+        _mark_dirty()
 
 
-def normalize_mac(mac: str) -> str:
-    """Normalize MAC to colon-separated uppercase (e.g., AA:BB:CC:DD:EE:FF)."""
+atexit.register(flush_devices)
+
+
+def _clean_mac(mac: str) -> str:
+    """Strip separators; return the 12 hex digits or '' if invalid."""
     if not isinstance(mac, str):
         return ''
-    cleaned = re.sub(r'[^0-9A-Fa-f]', '', mac)
-    if len(cleaned) != 12:
+    cleaned = mac.translate(_MAC_STRIP)
+    if len(cleaned) != 12 or not _HEX.issuperset(cleaned):
         return ''
-    parts = [cleaned[i:i+2].upper() for i in range(0, 12, 2)]
-    return ':'.join(parts)
+    return cleaned
 
 
-def validate_mac(mac: str) -> bool:
-    norm = normalize_mac(mac)
-    return len(norm) == 17
+def normalize_mac(mac: str) -> str:
+    """Normalize MAC to colon-separated uppercase (e.g., AA:BB:CC:DD:EE:FF); '' if invalid."""
+    if not isinstance(mac, str):
+        return ''
+    return _normalize_mac_cached(mac)
+
+
+@functools.lru_cache(maxsize=1024)
+def _normalize_mac_cached(mac: str) -> str:
+    s = _clean_mac(mac).upper()
+    if not s:
+        return ''
+    return f'{s[0:2]}:{s[2:4]}:{s[4:6]}:{s[6:8]}:{s[8:10]}:{s[10:12]}'
 
 
 def mac_to_bytes(mac: str) -> bytes:
-    norm = normalize_mac(mac)
-    if not norm:
+    cleaned = _clean_mac(mac)
+    if not cleaned:
         raise ValueError('Invalid MAC')
-    return bytes(int(b, 16) for b in norm.split(':'))
+    return bytes.fromhex(cleaned)
+
+
+# Shared broadcast-enabled UDP socket used for every magic packet; the lock
+# keeps a batch from interleaving with sends from other server threads
+_WOL_SOCK = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+_WOL_SOCK.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+_WOL_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=512)
+def build_magic_packet(mac: str) -> bytes:
+    """Build the 102-byte WOL payload: 6 x 0xFF followed by the MAC 16 times.
+
+    Cached per MAC string, so callers should pass the normalized form.
+    """
+    return b'\xff' * 6 + mac_to_bytes(mac) * 16
 
 
 def send_wol(mac: str, ip: str = '255.255.255.255', port: int = 9) -> None:
     """Send WOL magic packet to broadcast or directed address."""
-    mac_bytes = mac_to_bytes(mac)
-    magic_packet = b'\xff' * 6 + mac_bytes * 16
-    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-        s.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        s.sendto(magic_packet, (ip, int(port)))
-    logger.info(f'发送WOL数据包: MAC={mac}, IP={ip}, Port={port}')
+    magic_packet = build_magic_packet(normalize_mac(mac) or mac)
+    with _WOL_LOCK:
+        _WOL_SOCK.sendto(magic_packet, (ip, int(port)))
+    logger.info('发送WOL数据包: MAC=%s, IP=%s, Port=%s', mac, ip, port)
+
+
+# Linux sendmmsg(2) structures, used to push a whole batch in one syscall
+class _SockaddrIn(ctypes.Structure):
+    _fields_ = [('sin_family', ctypes.c_ushort), ('sin_port', ctypes.c_ushort),
+                ('sin_addr', ctypes.c_ubyte * 4), ('sin_zero', ctypes.c_ubyte * 8)]
+
+
+class _Iovec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+
+class _Msghdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.POINTER(_Iovec)), ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+
+class _Mmsghdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _Msghdr), ('msg_len', ctypes.c_uint)]
+
+
+def _load_sendmmsg():
+    """Return libc's sendmmsg() via ctypes, or None where it is unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        fn = ctypes.CDLL('libc.so.6', use_errno=True).sendmmsg
+    except (OSError, AttributeError):
+        return None
+    fn.argtypes = [ctypes.c_int, ctypes.POINTER(_Mmsghdr), ctypes.c_uint, ctypes.c_int]
+    fn.restype = ctypes.c_int
+    return fn
+
+
+_sendmmsg = _load_sendmmsg()
+
+
+def _sendmmsg_batch(items) -> int:
+    """Send (packet, ip, port) items with sendmmsg(); return how many were sent."""
+    n = len(items)
+    addrs = (_SockaddrIn * n)()
+    iovs = (_Iovec * n)()
+    msgs = (_Mmsghdr * n)()
+    bufs = []
+    for i, (packet, ip, port) in enumerate(items):
+        addrs[i].sin_family = socket.AF_INET
+        addrs[i].sin_port = socket.htons(int(port))
+        addrs[i].sin_addr[:] = socket.inet_aton(ip)
+        buf = ctypes.create_string_buffer(packet, len(packet))
+        bufs.append(buf)
+        iovs[i].iov_base = ctypes.addressof(buf)
+        iovs[i].iov_len = len(packet)
+        hdr = msgs[i].msg_hdr
+        hdr.msg_name = ctypes.addressof(addrs[i])
+        hdr.msg_namelen = ctypes.sizeof(_SockaddrIn)
+        hdr.msg_iov = ctypes.pointer(iovs[i])
+        hdr.msg_iovlen = 1
+
+    sent = 0
+    fd = _WOL_SOCK.fileno()
+    while sent < n:
+        ret = _sendmmsg(fd, ctypes.cast(ctypes.byref(msgs, sent * ctypes.sizeof(_Mmsghdr)),
+                                        ctypes.POINTER(_Mmsghdr)), n - sent, 0)
+        if ret <= 0:
+            break
+        sent += ret
+    return sent
+
+
+def send_wol_batch(items) -> list:
+    """Send a batch of (packet, ip, port) magic packets.
+
+    Uses a single sendmmsg() call on Linux; packets it could not send (or all
+    of them on other platforms) go out one by one with sendto(). Returns an
+    error message or None for each item.
+    """
+    errors = [None] * len(items)
+    start = 0
+    with _WOL_LOCK:
+        if _sendmmsg is not None and items:
+            try:
+                start = _sendmmsg_batch(items)
+            except (OSError, ValueError, OverflowError):
+                # e.g. a hostname instead of an IPv4 literal, or a port out of range;
+                # let sendto() resolve or report it per item
+                start = 0
+        for i in range(start, len(items)):
+            packet, ip, port = items[i]
+            try:
+                _WOL_SOCK.sendto(packet, (ip, int(port)))
+            except Exception as e:
+                errors[i] = str(e)
+    return errors
+
+
+# connect_ex() results meaning "in progress" on a non-blocking socket
+_CONNECT_PENDING = {errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK)}
+
+
+# SO_LINGER on with a zero timeout: close() sends RST instead of FIN, so probe
+# sockets skip TIME_WAIT and don't pile up ephemeral ports while monitoring
+_LINGER_RST = struct.pack('ii', 1, 0)
 
 
 def check_port(ip: str, port: int = 3389, timeout: float = 1.0) -> dict:
@@ -106,605 +407,278 @@ def check_port(ip: str, port: int = 3389, timeout: float = 1.0) -> dict:
         return {'online': False, 'latency': None}
     
     try:
-        start_time = time.time()
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
+    except OSError:
+        return {'online': False, 'latency': None}
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RST)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setblocking(False)
+        start_ns = time.monotonic_ns()
         result = sock.connect_ex((ip, port))
-        sock.close()
-        
-        if result == 0:
-            latency = int((time.time() - start_time) * 1000)  # Convert to ms
-            return {'online': True, 'latency': latency}
-        else:
+        if result != 0 and result not in _CONNECT_PENDING:
+            return {'online': False, 'latency': None}
+        # Writable once the handshake finishes; Windows flags failures as exceptional
+        _, writable, _ = select.select([], [sock], [sock], timeout)
+        if not writable or sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0:
             return {'online': False, 'latency': None}
+        latency = (time.monotonic_ns() - start_ns) // 1_000_000
+        return {'online': True, 'latency': latency}
+    except Exception:
+        return {'online': False, 'latency': None}
+    finally:
+        sock.close()
+
+
+def _icmp_supported() -> bool:
+    """Whether unprivileged ICMP datagram sockets work here (Linux ping_group_range, macOS)."""
+    try:
+        socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP).close()
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+_ICMP_SUPPORTED = _icmp_supported()
+_icmp_seq = itertools.count(1)
+
+
+def _icmp_echo_request(seq: int) -> bytes:
+    """Build an ICMP echo request; the identifier is assigned by the kernel."""
+    payload = b'wol-probe'
+    data = struct.pack('!BBHHH', 8, 0, 0, 0, seq) + payload
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return struct.pack('!BBHHH', 8, 0, ~total & 0xFFFF, 0, seq) + payload
+
+
+def _is_echo_reply(data: bytes, seq: int) -> bool:
+    # macOS delivers the IP header as well; Linux starts at the ICMP header
+    if len(data) >= 20 and data[0] >> 4 == 4:
+        data = data[(data[0] & 0x0F) * 4:]
+    return len(data) >= 8 and data[0] == 0 and struct.unpack('!H', data[6:8])[0] == seq
+
+
+async def _icmp_probe(ip: str, timeout: float) -> dict:
+    """Ping ip once over an unprivileged ICMP socket."""
+    loop = asyncio.get_running_loop()
+    seq = next(_icmp_seq) & 0xFFFF
+    sock = None
+
+    async def ping() -> int:
+        addr = ip
+        try:
+            socket.inet_pton(socket.AF_INET, ip)
+        except OSError:
+            # A hostname: sendto() would resolve it with a blocking lookup on
+            # the shared probe loop, so resolve it in the executor instead
+            infos = await loop.getaddrinfo(ip, None, family=socket.AF_INET, type=socket.SOCK_DGRAM)
+            addr = infos[0][4][0]
+        start_ns = time.monotonic_ns()
+        sock.sendto(_icmp_echo_request(seq), (addr, 0))
+        while not _is_echo_reply(await loop.sock_recv(sock, 1024), seq):
+            pass
+        return (time.monotonic_ns() - start_ns) // 1_000_000
+
+    try:
+        # Opening the socket can fail too (e.g. EMFILE with many devices)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        sock.setblocking(False)
+        return {'online': True, 'latency': await asyncio.wait_for(ping(), timeout)}
     except Exception:
         return {'online': False, 'latency': None}
+    finally:
+        if sock is not None:
+            sock.close()
+
+
+async def _tcp_probe(ip: str, port: int, timeout: float) -> dict:
+    """Async counterpart of check_port()."""
+    start_ns = time.monotonic_ns()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except Exception:
+        return {'online': False, 'latency': None}
+    latency = (time.monotonic_ns() - start_ns) // 1_000_000
+    try:
+        # asyncio already sets TCP_NODELAY on its TCP transports
+        writer.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RST)
+    except OSError:
+        pass
+    writer.close()
+    return {'online': True, 'latency': latency}
+
+
+async def _probe(ip: str, port: int = 3389, timeout: float = 1.0) -> dict:
+    """Liveness probe: an ICMP echo raced against a TCP connect to port.
+
+    Ping is one small packet each way and also sees hosts without RDP; the TCP
+    probe still catches Windows hosts whose firewall drops ping, and is all we
+    have where ICMP sockets are unavailable (e.g. Windows).
+    """
+    probes = [asyncio.ensure_future(_tcp_probe(ip, port, timeout))]
+    if _ICMP_SUPPORTED:
+        probes.append(asyncio.ensure_future(_icmp_probe(ip, timeout)))
+    try:
+        for next_done in asyncio.as_completed(probes):
+            result = await next_done
+            if result['online']:
+                return result
+        return {'online': False, 'latency': None}
+    finally:
+        for probe in probes:
+            probe.cancel()
+
+
+# At most this many devices are probed at once; each holds a TCP and an ICMP
+# socket, so this also bounds the fds a large device list can use
+_PROBE_CONCURRENCY = 64
+_probe_slots = None  # asyncio.Semaphore, created on the probe loop
+
+
+async def _probe_device(device: dict) -> dict:
+    """Probe one device; never raises, so one bad device can't fail a batch."""
+    global _probe_slots
+    if _probe_slots is None:
+        _probe_slots = asyncio.Semaphore(_PROBE_CONCURRENCY)
+    ip = device.get('ip')
+    status = {'online': False, 'latency': None}
+    if ip:
+        try:
+            async with _probe_slots:
+                status = await _probe(ip)
+        except Exception as e:
+            logger.warning('检测 %s 出错: %s', ip, e)
+    return {'mac': device.get('mac'), **status}
+
+
+async def _probe_all(devices: list) -> list:
+    """Probe every device concurrently on one event loop; results keep list order."""
+    return await asyncio.gather(*(_probe_device(d) for d in devices))
+
+
+async def _probe_stream(devices: list, results: queue.Queue):
+    """Put each device's result on results as soon as it is known.
+
+    Ends with None when every device was reported, or with the exception
+    if the round was aborted part-way.
+    """
+    end = RuntimeError('检测被中断')  # e.g. cancelled while shutting down
+    try:
+        for next_done in asyncio.as_completed([_probe_device(d) for d in devices]):
+            results.put(await next_done)
+        end = None
+    except Exception as e:
+        end = e
+    finally:
+        results.put(end)
+
+
+# Long-lived event loop for probes, so monitor ticks don't pay for creating
+# and tearing down a loop (and its selector) on every request
+_PROBE_LOOP = asyncio.new_event_loop()
+threading.Thread(target=_PROBE_LOOP.run_forever, name='probe', daemon=True).start()
+
+
+def probe_all(devices: list) -> list:
+    """Run _probe_all() on the shared probe loop from a request thread."""
+    return asyncio.run_coroutine_threadsafe(_probe_all(devices), _PROBE_LOOP).result()
+
+
+def probe_host(ip: str, timeout: float = 1.0) -> dict:
+    """Probe a single host on the shared probe loop."""
+    return asyncio.run_coroutine_threadsafe(_probe(ip, timeout=timeout), _PROBE_LOOP).result()
+
+
+_sync_devices()
 
 
 # -------------------- Routes --------------------
 
+_ASSET_MAX_AGE = 365 * 24 * 3600
+
+
+def _load_static(name: str) -> tuple:
+    """Read a file from static/ and precompress it: (body, gzipped, sha1)."""
+    with open(os.path.join(STATIC_DIR, name), 'rb') as f:
+        body = f.read()
+    return body, gzip.compress(body, 9), hashlib.sha1(body).hexdigest()
+
+
+def _load_assets() -> dict:
+    """Load app.css/app.js under content-hashed names, e.g. app.1a2b3c4d.js."""
+    assets = {}
+    for name, mimetype in (('app.css', 'text/css'), ('app.js', 'text/javascript')):
+        body, gz, digest = _load_static(name)
+        stem, ext = os.path.splitext(name)
+        assets[f'{stem}.{digest[:8]}{ext}'] = (name, mimetype, body, gz, digest)
+    return assets
+
+
+def _load_index(assets: dict):
+    """Read static/index.html once, point it at the hashed assets and precompress it."""
+    with open(INDEX_FILE, 'rb') as f:
+        html = f.read()
+    for hashed, (name, *_) in assets.items():
+        html = html.replace(f'/static/{name}"'.encode(), f'/assets/{hashed}"'.encode())
+    return html, gzip.compress(html, 9), hashlib.sha1(html).hexdigest()
+
+
+_ASSETS = _load_assets()
+_INDEX_HTML, _INDEX_GZ, _INDEX_ETAG = _load_index(_ASSETS)
+
+
+def _precompressed(body: bytes, gz: bytes, etag: str, mimetype: str, cache_control: str) -> Response:
+    """Serve in-memory bytes, gzipped when the client accepts it (and gz is given)."""
+    use_gzip = gz is not None and request.accept_encodings['gzip'] > 0
+    response = Response(gz if use_gzip else body, mimetype=mimetype)
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = cache_control
+    response.set_etag(etag + ('-gz' if use_gzip else ''))
+    return response.make_conditional(request)
+
+
 @app.route('/')
 def index():
-    html = r'''<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1" />
-  <title>WOL 唤醒工具</title>
-  <style>
-    :root { --bg:#0f172a; --panel:#111827; --text:#e5e7eb; --muted:#9ca3af; --primary:#22c55e; --danger:#ef4444; --border:#1f2937; --accent:#3b82f6; --online:#22c55e; --offline:#6b7280; }
-    * { box-sizing: border-box; }
-    body { margin:0; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, 'Noto Sans', 'PingFang SC', 'Microsoft YaHei', sans-serif; background: var(--bg); color: var(--text); }
-    header { padding: 24px; border-bottom: 1px solid var(--border); background: linear-gradient(180deg, rgba(59,130,246,0.25), rgba(34,197,94,0.2)); }
-    header h1 { margin:0; font-size: 20px; }
-    .container { max-width: 1200px; margin: 24px auto; padding: 0 16px; }
-    .panel { background: var(--panel); border: 1px solid var(--border); border-radius: 12px; padding: 16px; margin-bottom: 16px; }
-    .row { display:flex; gap:12px; flex-wrap:wrap; align-items:center; }
-    input, button, select { height: 36px; border-radius: 8px; border: 1px solid var(--border); background:#0b1220; color: var(--text); padding: 0 12px; }
-    input::placeholder { color: var(--muted); }
-    button { cursor:pointer; border: none; }
-    button.primary { background: var(--primary); color: #041d12; font-weight: 600; }
-    button.secondary { background: var(--accent); color: #05142e; font-weight: 600; }
-    button.danger { background: var(--danger); color: #330b0b; font-weight: 600; }
-    button.success { background: #10b981; color: #042f1e; font-weight: 600; }
-    button:disabled { opacity: 0.5; cursor: not-allowed; }
-    table { width: 100%; border-collapse: collapse; }
-    th, td { border-bottom: 1px solid var(--border); padding: 10px; text-align: left; }
-    th { color: var(--muted); font-weight: 500; }
-    .actions { display:flex; gap:8px; }
-    .badge { display:inline-block; padding:2px 8px; border-radius:999px; border:1px solid var(--border); color: var(--muted); font-size:12px; }
-    .footer { color: var(--muted); font-size: 12px; text-align:center; margin-top: 12px; }
-    .checkbox { width: 18px; height: 18px; }
-    .status-indicator { display:inline-flex; align-items:center; gap:6px; }
-    .status-dot { width:10px; height:10px; border-radius:50%; }
-    .status-dot.online { background: var(--online); box-shadow: 0 0 8px var(--online); animation: pulse 2s infinite; }
-    .status-dot.offline { background: var(--offline); }
-    .latency { font-size:12px; color: var(--muted); margin-left:4px; }
-    .latency.good { color: var(--online); }
-    .latency.medium { color: #f59e0b; }
-    .latency.bad { color: var(--danger); }
-    @keyframes pulse { 0%, 100% { opacity: 1; } 50% { opacity: 0.5; } }
-    .monitor-controls { display:flex; gap:12px; align-items:center; flex-wrap:wrap; }
-    .monitor-controls label { color: var(--text); display:flex; align-items:center; gap:8px; }
-    .switch { position:relative; display:inline-block; width:48px; height:24px; }
-    .switch input { opacity:0; width:0; height:0; }
-    .slider { position:absolute; cursor:pointer; top:0; left:0; right:0; bottom:0; background:#374151; border-radius:24px; transition:0.3s; }
-    .slider:before { position:absolute; content:""; height:18px; width:18px; left:3px; bottom:3px; background:white; border-radius:50%; transition:0.3s; }
-    input:checked + .slider { background: var(--primary); }
-    input:checked + .slider:before { transform: translateX(24px); }
-    .sortable { cursor: pointer; user-select: none; position: relative; }
-    .sortable:hover { color: var(--primary); }
-    .sortable::after { content: '⇅'; margin-left: 6px; opacity: 0.3; font-size: 14px; }
-    .sortable.asc::after { content: '↑'; opacity: 1; color: var(--primary); }
-    .sortable.desc::after { content: '↓'; opacity: 1; color: var(--primary); }
-  </style>
-</head>
-<body>
-  <header>
-    <h1>WOL 唤醒工具</h1>
-    <div class="badge">管理多台设备 · 支持搜索与批量唤醒</div>
-  </header>
-  <div class="container">
-    <div class="panel">
-      <div class="monitor-controls">
-        <label>
-          <span>实时监控</span>
-          <label class="switch">
-            <input type="checkbox" id="monitorToggle" />
-            <span class="slider"></span>
-          </label>
-        </label>
-        <label>
-          <span>检测间隔</span>
-          <select id="monitorInterval">
-            <option value="5">5秒</option>
-            <option value="10">10秒</option>
-            <option value="30">30秒</option>
-            <option value="60" selected>60秒</option>
-            <option value="120">120秒</option>
-            <option value="360">360秒</option>
-          </select>
-        </label>
-        <button id="checkNow" class="secondary">立即检测</button>
-        <label id="autostartLabel" style="display:none;">
-          <span>开机自启</span>
-          <label class="switch">
-            <input type="checkbox" id="autostartToggle" />
-            <span class="slider"></span>
-          </label>
-        </label>
-        <button id="viewLogs" class="secondary" style="display:none;">查看日志</button>
-        <div style="flex:1"></div>
-        <span id="monitorStatus" style="color:var(--muted); font-size:12px;"></span>
-      </div>
-    </div>
-
-    <div class="panel">
-      <div class="row">
-        <input id="search" type="text" placeholder="搜索：MAC / 用户 IP / 备注" style="flex:1" />
-        <button id="refresh" class="secondary">刷新</button>
-        <button id="wakeSelected" class="primary">唤醒选中</button>
-      </div>
-    </div>
-
-    <div class="panel">
-      <div style="margin-bottom:8px; color:var(--muted)">添加设备（用户 IP 仅用于搜索；如需跨网段唤醒，可在最后配置广播 IP）</div>
-      <div class="row">
-        <input id="mac" type="text" placeholder="MAC 地址（AA:BB:CC:DD:EE:FF）" style="flex:1" />
-        <input id="ip" type="text" placeholder="用户 IP（仅用于搜索，可选）" style="flex:1" />
-        <input id="remark" type="text" placeholder="备注（可选）" style="flex:1" />
-        <input id="broadcast_ip" type="text" placeholder="广播 IP（可选，用于跨网段唤醒）" style="flex:1" />
-        <button id="add" class="primary">添加</button>
-      </div>
-    </div>
-
-    <div class="panel">
-      <table>
-        <thead>
-          <tr>
-            <th style="width:40px"><input class="checkbox" type="checkbox" id="checkAll" /></th>
-            <th style="width:120px" class="sortable" id="sortStatus">状态</th>
-            <th>备注</th>
-            <th>MAC 地址</th>
-            <th>用户 IP</th>
-            <th>广播 IP</th>
-            <th style="width:340px">操作</th>
-          </tr>
-        </thead>
-        <tbody id="tbody"></tbody>
-      </table>
-    </div>
-
-    <div class="footer">WOL XF · 端口默认 9</div>
-  </div>
-
-<script>
-const api = {
-  list: () => fetch('/api/devices').then(r=>r.json()),
-  add: (d) => fetch('/api/devices', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(d)}).then(r=>r.json()),
-  del: (mac) => fetch('/api/devices/' + encodeURIComponent(mac), {method:'DELETE'}).then(r=>r.json()),
-  wake: (mac, port) => fetch('/api/wake', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({mac, port})}).then(r=>r.json()),
-  search: (q) => fetch('/api/search?q=' + encodeURIComponent(q)).then(r=>r.json()),
-  checkAll: () => fetch('/api/check_all').then(r=>r.json()),
-  checkOne: (ip) => fetch('/api/check', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({ip})}).then(r=>r.json()),
-  rdp: (ip) => fetch('/api/rdp', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({ip})}).then(r=>r.json()),
-  getAutostart: () => fetch('/api/autostart').then(r=>r.json()),
-  setAutostart: (enable) => fetch('/api/autostart', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({enable})}).then(r=>r.json()),
-  getLogs: (lines) => fetch('/api/logs?lines=' + (lines || 100)).then(r=>r.json()),
-};
-
-let devices = [];
-let filtered = [];
-let deviceStatus = {};
-let monitorInterval = null;
-let isMonitoring = false;
-let sortOrder = 'desc'; // null, 'asc', 'desc' - 默认离线在前
-let isLocalAccess = false; // 是否本地访问
-
-function render(list){
-  const tbody = document.getElementById('tbody');
-  tbody.innerHTML = '';
-  list.forEach(d => {
-    const status = deviceStatus[d.mac] || {online: false, latency: null};
-    const statusHtml = d.ip ? renderStatus(status) : '<span style="color:var(--muted); font-size:12px;">无IP</span>';
-    const checkBtn = d.ip ? `<button class=\"secondary\" data-action=\"check\" data-mac=\"${d.mac}\" data-ip=\"${d.ip}\">检测</button>` : '';
-    // 只有本地访问才显示远程按钮
-    const rdpBtn = (d.ip && isLocalAccess) ? `<button class=\"success\" data-action=\"rdp\" data-ip=\"${d.ip}\">远程</button>` : '';
-    
-    const tr = document.createElement('tr');
-    tr.innerHTML = `
-      <td><input class=\"checkbox\" type=\"checkbox\" data-mac=\"${d.mac}\" /></td>
-      <td>${statusHtml}</td>
-      <td>${escapeHtml(d.remark || '')}</td>
-      <td>${escapeHtml(d.mac)}</td>
-      <td>${escapeHtml(d.ip || '')}</td>
-      <td>${escapeHtml(d.broadcast_ip || '')}</td>
-      <td class=\"actions\">
-        ${checkBtn}
-        ${rdpBtn}
-        <button class=\"secondary\" data-action=\"wake\" data-mac=\"${d.mac}\">唤醒</button>
-        <button class=\"danger\" data-action=\"del\" data-mac=\"${d.mac}\">删除</button>
-      </td>`;
-    tbody.appendChild(tr);
-  });
-}
-
-function renderStatus(status){
-  if(!status.online){
-    return '<div class="status-indicator"><span class="status-dot offline"></span><span>离线</span></div>';
-  }
-  const latencyClass = status.latency < 50 ? 'good' : status.latency < 150 ? 'medium' : 'bad';
-  return `<div class="status-indicator"><span class="status-dot online"></span><span>在线</span><span class="latency ${latencyClass}">${status.latency}ms</span></div>`;
-}
-
-function escapeHtml(str){
-  return String(str).replace(/[&<>\"]/g, s => ({'&':'&amp;','<':'&lt;','>':'&gt;','\"':'&quot;'}[s]));
-}
-
-async function refresh(){
-  devices = await api.list();
-  const q = document.getElementById('search').value.trim();
-  if(q){ filtered = await api.search(q); } else { filtered = devices; }
-  applySortAndRender();
-}
-
-function applySortAndRender(){
-  let toRender = [...filtered];
-  
-  if(sortOrder === 'asc'){
-    // 在线的在上面
-    toRender.sort((a, b) => {
-      const statusA = deviceStatus[a.mac] || {online: false};
-      const statusB = deviceStatus[b.mac] || {online: false};
-      if(statusA.online && !statusB.online) return -1;
-      if(!statusA.online && statusB.online) return 1;
-      return 0;
-    });
-  } else if(sortOrder === 'desc'){
-    // 离线的在上面
-    toRender.sort((a, b) => {
-      const statusA = deviceStatus[a.mac] || {online: false};
-      const statusB = deviceStatus[b.mac] || {online: false};
-      if(!statusA.online && statusB.online) return -1;
-      if(statusA.online && !statusB.online) return 1;
-      return 0;
-    });
-  }
-  
-  render(toRender);
-  updateSortIndicator();
-}
-
-function updateSortIndicator(){
-  const sortBtn = document.getElementById('sortStatus');
-  sortBtn.classList.remove('asc', 'desc');
-  if(sortOrder === 'asc'){
-    sortBtn.classList.add('asc');
-  } else if(sortOrder === 'desc'){
-    sortBtn.classList.add('desc');
-  }
-}
-
-async function checkAllDevices(){
-  try {
-    const results = await api.checkAll();
-    results.forEach(r => {
-      deviceStatus[r.mac] = {online: r.online, latency: r.latency};
-    });
-    applySortAndRender();
-    updateMonitorStatus('最后检测: ' + new Date().toLocaleTimeString());
-  } catch(e) {
-    console.error('检测失败:', e);
-  }
-}
-
-async function checkSingleDevice(mac, ip){
-  try {
-    const result = await api.checkOne(ip);
-    deviceStatus[mac] = {online: result.online, latency: result.latency};
-    applySortAndRender();
-  } catch(e) {
-    console.error('检测失败:', e);
-  }
-}
-
-async function openRDP(ip){
-  try {
-    const res = await api.rdp(ip);
-    if(res.error){
-      alert('打开远程桌面失败: ' + res.error);
-    }
-  } catch(e) {
-    alert('打开远程桌面失败: ' + e.message);
-  }
-}
-
-function checkLocalAccess(){
-  const hostname = window.location.hostname;
-  isLocalAccess = hostname === 'localhost' || hostname === '127.0.0.1' || hostname === '::1';
-}
-
-function startMonitoring(){
-  if(monitorInterval) return;
-  const interval = parseInt(document.getElementById('monitorInterval').value) * 1000;
-  isMonitoring = true;
-  saveMonitorSettings();
-  checkAllDevices();
-  monitorInterval = setInterval(checkAllDevices, interval);
-  updateMonitorStatus('监控中...');
-}
-
-function stopMonitoring(){
-  if(monitorInterval){
-    clearInterval(monitorInterval);
-    monitorInterval = null;
-  }
-  isMonitoring = false;
-  saveMonitorSettings();
-  updateMonitorStatus('已停止');
-}
-
-function updateMonitorStatus(text){
-  document.getElementById('monitorStatus').textContent = text;
-}
-
-function saveMonitorSettings(){
-  const settings = {
-    enabled: isMonitoring,
-    interval: document.getElementById('monitorInterval').value
-  };
-  localStorage.setItem('monitorSettings', JSON.stringify(settings));
-}
-
-function loadMonitorSettings(){
-  try {
-    const saved = localStorage.getItem('monitorSettings');
-    if(saved){
-      const settings = JSON.parse(saved);
-      document.getElementById('monitorInterval').value = settings.interval || '60';
-      if(settings.enabled){
-        document.getElementById('monitorToggle').checked = true;
-        startMonitoring();
-      }
-    }
-  } catch(e) {
-    console.error('加载设置失败:', e);
-  }
-}
-
-async function loadAutostartStatus(){
-  try {
-    const res = await api.getAutostart();
-    if(res.enabled !== undefined){
-      // Show autostart controls (Windows only)
-      document.getElementById('autostartLabel').style.display = 'flex';
-      document.getElementById('autostartToggle').checked = res.enabled;
-    }
-  } catch(e) {
-    // Not on Windows or API not available
-    console.log('开机自启功能不可用');
-  }
-}
-
-async function checkLogsAvailable(){
-  try {
-    const res = await api.getLogs(1);
-    if(res.logs || res.error){
-      document.getElementById('viewLogs').style.display = 'block';
-    }
-  } catch(e) {
-    console.log('日志功能不可用');
-  }
-}
-
-function showLogsModal(){
-  const modal = document.createElement('div');
-  modal.style.cssText = 'position:fixed; top:0; left:0; right:0; bottom:0; background:rgba(0,0,0,0.8); display:flex; align-items:center; justify-content:center; z-index:9999;';
-  
-  const content = document.createElement('div');
-  content.style.cssText = 'background:var(--panel); border:1px solid var(--border); border-radius:12px; padding:24px; max-width:800px; width:90%; max-height:80vh; display:flex; flex-direction:column;';
-  
-  const title = document.createElement('h3');
-  title.textContent = '系统日志';
-  title.style.cssText = 'margin:0 0 16px 0; color:var(--text);';
-  
-  const logArea = document.createElement('pre');
-  logArea.style.cssText = 'flex:1; overflow:auto; background:#0b1220; border:1px solid var(--border); border-radius:8px; padding:12px; color:var(--text); font-size:12px; line-height:1.5; margin:0;';
-  logArea.textContent = '加载中...';
-  
-  const closeBtn = document.createElement('button');
-  closeBtn.textContent = '关闭';
-  closeBtn.className = 'secondary';
-  closeBtn.style.cssText = 'margin-top:16px; align-self:flex-end;';
-  closeBtn.onclick = () => document.body.removeChild(modal);
-  
-  content.appendChild(title);
-  content.appendChild(logArea);
-  content.appendChild(closeBtn);
-  modal.appendChild(content);
-  document.body.appendChild(modal);
-  
-  // Load logs
-  api.getLogs(200).then(res => {
-    if(res.logs){
-      logArea.textContent = res.logs;
-      logArea.scrollTop = logArea.scrollHeight;
-    } else if(res.error){
-      logArea.textContent = '加载日志失败: ' + res.error;
-    }
-  });
-  
-  modal.onclick = (e) => {
-    if(e.target === modal) document.body.removeChild(modal);
-  };
-}
-
-function bindEvents(){
-  document.getElementById('refresh').addEventListener('click', refresh);
-  
-  document.getElementById('sortStatus').addEventListener('click', () => {
-    if(sortOrder === null){
-      sortOrder = 'asc'; // 第一次点击：在线在上
-    } else if(sortOrder === 'asc'){
-      sortOrder = 'desc'; // 第二次点击：离线在上
-    } else {
-      sortOrder = null; // 第三次点击：取消排序
-    }
-    applySortAndRender();
-  });
-  
-  document.getElementById('monitorToggle').addEventListener('change', (e) => {
-    if(e.target.checked){
-      startMonitoring();
-    } else {
-      stopMonitoring();
-    }
-  });
-  
-  document.getElementById('monitorInterval').addEventListener('change', () => {
-    saveMonitorSettings();
-    if(isMonitoring){
-      stopMonitoring();
-      startMonitoring();
-    }
-  });
-  
-  document.getElementById('checkNow').addEventListener('click', checkAllDevices);
-  
-  document.getElementById('autostartToggle').addEventListener('change', async (e) => {
-    const res = await api.setAutostart(e.target.checked);
-    if(res.ok){
-      console.log('开机自启已' + (res.enabled ? '启用' : '禁用'));
-    }
-  });
-  
-  document.getElementById('viewLogs').addEventListener('click', showLogsModal);
-  
-  document.getElementById('add').addEventListener('click', async () => {
-    const mac = document.getElementById('mac').value.trim();
-    const ip = document.getElementById('ip').value.trim();
-    const remark = document.getElementById('remark').value.trim();
-    const broadcast_ip = document.getElementById('broadcast_ip').value.trim();
-    if(!mac){ alert('请填写 MAC 地址'); return; }
-    const res = await api.add({mac, ip: ip || undefined, remark: remark || undefined, broadcast_ip: broadcast_ip || undefined});
-    if(res.error){ alert(res.error); } else {
-      document.getElementById('mac').value='';
-      document.getElementById('ip').value='';
-      document.getElementById('remark').value='';
-      document.getElementById('broadcast_ip').value='';
-      refresh();
-    }
-  });
-  
-  document.getElementById('search').addEventListener('input', debounce(refresh, 200));
-  
-  document.getElementById('tbody').addEventListener('click', async (e) => {
-    const btn = e.target.closest('button');
-    if(!btn) return;
-    const mac = btn.getAttribute('data-mac');
-    const action = btn.getAttribute('data-action');
-    if(action === 'rdp'){
-      const ip = btn.getAttribute('data-ip');
-      openRDP(ip);
-    } else if(action === 'check'){
-      const ip = btn.getAttribute('data-ip');
-      btn.disabled = true;
-      btn.textContent = '检测中...';
-      await checkSingleDevice(mac, ip);
-      btn.disabled = false;
-      btn.textContent = '检测';
-    } else if(action === 'wake'){
-      btn.disabled = true;
-      const originalText = btn.textContent;
-      btn.textContent = '发送中...';
-      try {
-        const res = await api.wake(mac);
-        if(res.error){ 
-          alert(res.error); 
-        } else { 
-          btn.textContent = '已发送';
-          setTimeout(() => { btn.textContent = originalText; btn.disabled = false; }, 1500);
-        }
-      } catch(e) {
-        alert('唤醒失败: ' + e.message);
-        btn.textContent = originalText;
-        btn.disabled = false;
-      }
-      if(btn.textContent === '发送中...') {
-        btn.textContent = originalText;
-        btn.disabled = false;
-      }
-    } else if(action === 'del'){
-      if(confirm('确定删除该设备？')){
-        const res = await api.del(mac);
-        if(res.error){ alert(res.error); } else { refresh(); }
-      }
-    }
-  });
-  
-  document.getElementById('checkAll').addEventListener('change', (e) => {
-    document.querySelectorAll('#tbody .checkbox').forEach(chk => chk.checked = e.target.checked);
-  });
-  
-  document.getElementById('wakeSelected').addEventListener('click', async () => {
-    const chks = Array.from(document.querySelectorAll('#tbody .checkbox')).filter(c => c.checked);
-    if(chks.length === 0){ alert('请先选择设备'); return; }
-    
-    const btn = document.getElementById('wakeSelected');
-    btn.disabled = true;
-    btn.textContent = '发送中...';
-    
-    let successCount = 0;
-    let failCount = 0;
-    const errors = [];
-    
-    for(const c of chks){
-      const mac = c.getAttribute('data-mac');
-      try {
-        const res = await api.wake(mac);
-        if(res.error){ 
-          failCount++;
-          errors.push(`${mac}: ${res.error}`);
-        } else {
-          successCount++;
-        }
-      } catch(e) {
-        failCount++;
-        errors.push(`${mac}: ${e.message}`);
-      }
-    }
-    
-    btn.disabled = false;
-    btn.textContent = '唤醒选中';
-    
-    if(failCount > 0){
-      alert(`批量唤醒完成\n成功: ${successCount}台\n失败: ${failCount}台\n\n错误详情:\n${errors.join('\n')}`);
-    } else {
-      alert(`已成功发送 ${successCount} 台设备的唤醒数据包`);
-    }
-  });
-}
-
-function debounce(fn, delay){
-  let t; return (...args) => { clearTimeout(t); t = setTimeout(() => fn.apply(null, args), delay); };
-}
-
-(async function init(){ 
-  checkLocalAccess();
-  bindEvents(); 
-  await refresh(); 
-  loadMonitorSettings();
-  loadAutostartStatus();
-  checkLogsAvailable();
-})();
-</script>
-</body>
-</html>'''
-    return Response(html, mimetype='text/html')
+    # Always revalidate (a cheap 304 via the ETag): the page names the current
+    # hashed assets, and old ones stop being served after a restart
+    return _precompressed(_INDEX_HTML, _INDEX_GZ, _INDEX_ETAG, 'text/html', 'no-cache')
+
+
+@app.route('/assets/<name>')
+def asset(name):
+    """Hashed CSS/JS; the name changes with the content, so caches may keep it forever."""
+    if name not in _ASSETS:
+        return _json({'error': '资源不存在'}, 404)
+    _, mimetype, body, gz, digest = _ASSETS[name]
+    return _precompressed(body, gz, digest, mimetype, f'public, max-age={_ASSET_MAX_AGE}, immutable')
 
 
 @app.route('/api/devices', methods=['GET'])
 def list_devices():
-    devices = load_devices()
-    return jsonify(devices)
+    _sync_devices()
+    # Precompressed in _reindex(), so Flask-Compress doesn't redo it per request
+    body, gz, etag = _DEVICES_JSON
+    return _precompressed(body, gz, etag, 'application/json', 'no-cache')
 
 
 @app.route('/api/devices', methods=['POST'])
 def add_device():
-    data = request.get_json(force=True) or {}
+    data = _read_json()
     mac = data.get('mac', '')
     ip = data.get('ip') or None  # 用户 IP，仅用于搜索
     remark = data.get('remark') or None
     broadcast_ip = data.get('broadcast_ip') or None
     client_ip = request.remote_addr
 
-    if not validate_mac(mac):
-        return jsonify({'error': 'MAC 地址格式不正确'}), 400
-
     mac_norm = normalize_mac(mac)
-    devices = load_devices()
-    if any(d.get('mac') == mac_norm for d in devices):
-        return jsonify({'error': '该设备已存在'}), 400
+    if not mac_norm:
+        return _json({'error': 'MAC 地址格式不正确'}, 400)
 
     device = {'mac': mac_norm}
     if ip:
@@ -714,149 +688,199 @@ def add_device():
     if broadcast_ip:
         device['broadcast_ip'] = broadcast_ip
 
-    devices.append(device)
-    save_devices(devices)
+    _sync_devices()
+    with _LOCK:
+        if mac_norm in _BY_MAC:
+            return _json({'error': '该设备已存在'}, 400)
+        devices = load_devices()
+        devices.append(device)
+        save_devices(devices)
     logger.info(f'[{client_ip}] 添加设备: {remark or mac_norm} ({mac_norm})')
-    return jsonify({'ok': True, 'device': device})
+    return _json({'ok': True, 'device': device})
 
 
 @app.route('/api/devices/<mac>', methods=['DELETE'])
 def delete_device(mac):
     mac_norm = normalize_mac(mac)
-    devices = load_devices()
     client_ip = request.remote_addr
     
-    # Find device name before deleting
-    device = next((d for d in devices if d.get('mac') == mac_norm), None)
-    device_name = device.get('remark', mac_norm) if device else mac_norm
-    
-    new_devices = [d for d in devices if d.get('mac') != mac_norm]
-    if len(new_devices) == len(devices):
-        return jsonify({'error': '设备不存在'}), 404
-    save_devices(new_devices)
+    _sync_devices()
+    with _LOCK:
+        device = _BY_MAC.get(mac_norm)
+        if device is None:
+            return _json({'error': '设备不存在'}, 404)
+        device_name = device.get('remark', mac_norm)
+        _DEVICES.remove(device)
+        _reindex()
+        _mark_dirty()
     logger.info(f'[{client_ip}] 删除设备: {device_name} ({mac_norm})')
-    return jsonify({'ok': True})
+    return _json({'ok': True})
+
+
+def filter_devices(q):
+    """Return devices whose MAC, IP or remark contains q (all if q is empty)."""
+    q = q.strip().lower()
+    if not q:
+        return load_devices()
+    _sync_devices()
+    return [d for d, haystack in _SEARCH_INDEX if q in haystack]
 
 
 @app.route('/api/search')
 def search_devices():
-    q = request.args.get('q', '').strip().lower()
-    devices = load_devices()
-    if not q:
-        return jsonify(devices)
-    def match(d):
-        return any(
-            q in str(d.get(k, '')).lower() for k in ['mac', 'ip', 'remark']
-        )
-    return jsonify([d for d in devices if match(d)])
+    q = request.args.get('q', '')
+    if not q.strip():
+        return list_devices()
+    return _json(filter_devices(q))
+
+
+@app.route('/api/state')
+def get_state():
+    """Everything the UI needs for one refresh, in a single response."""
+    return _json({'devices': filter_devices(request.args.get('q', ''))})
 
 
 @app.route('/api/wake', methods=['POST'])
 def wake_device():
-    data = request.get_json(force=True) or {}
+    data = _read_json()
     mac = data.get('mac', '')
     port = int(data.get('port') or 9)
     client_ip = request.remote_addr
 
-    if not validate_mac(mac):
-        return jsonify({'error': 'MAC 地址格式不正确'}), 400
+    mac_norm = normalize_mac(mac)
+    if not mac_norm:
+        return _json({'error': 'MAC 地址格式不正确'}, 400)
 
-    devices = load_devices()
-    dev = next((d for d in devices if d.get('mac') == normalize_mac(mac)), None)
+    _sync_devices()
+    dev = _BY_MAC.get(mac_norm)
     device_name = dev.get('remark', mac) if dev else mac
     # 如果配置了广播 IP，则使用；否则用全局广播 255.255.255.255
     broadcast_ip = dev.get('broadcast_ip') if dev and dev.get('broadcast_ip') else '255.255.255.255'
     try:
-        send_wol(mac, ip=broadcast_ip, port=port)
-        logger.info(f'[{client_ip}] 执行唤醒: {device_name} ({mac})')
-        return jsonify({'ok': True})
+        send_wol(mac_norm, ip=broadcast_ip, port=port)
+        logger.info('[%s] 执行唤醒: %s (%s)', client_ip, device_name, mac)
+        return _json({'ok': True})
     except Exception as e:
-        logger.error(f'[{client_ip}] 唤醒失败: {device_name} ({mac}) - {e}')
-        return jsonify({'error': str(e)}), 500
+        logger.error('[%s] 唤醒失败: %s (%s) - %s', client_ip, device_name, mac, e)
+        return _json({'error': str(e)}, 500)
+
+
+@app.route('/api/wake_batch', methods=['POST'])
+def wake_batch():
+    """Send magic packets for several devices in a single request."""
+    data = _read_json()
+    macs = data.get('macs') or []
+    port = int(data.get('port') or 9)
+    client_ip = request.remote_addr
+
+    if not isinstance(macs, list):
+        return _json({'error': 'macs 必须是 MAC 地址列表'}, 400)
+
+    _sync_devices()
+    results = []
+    pending = []  # (result, device_name, broadcast_ip) for each packet to send
+    items = []
+    for mac in macs:
+        mac_norm = normalize_mac(mac)
+        if not mac_norm:
+            results.append({'mac': mac, 'error': 'MAC 地址格式不正确'})
+            continue
+        dev = _BY_MAC.get(mac_norm)
+        device_name = dev.get('remark', mac) if dev else mac
+        broadcast_ip = dev.get('broadcast_ip') if dev and dev.get('broadcast_ip') else '255.255.255.255'
+        packet = build_magic_packet(mac_norm)
+        result = {'mac': mac}
+        results.append(result)
+        pending.append((result, device_name, broadcast_ip))
+        items.append((packet, broadcast_ip, port))
+
+    for (result, device_name, broadcast_ip), error in zip(pending, send_wol_batch(items)):
+        mac = result['mac']
+        if error:
+            logger.error('[%s] 唤醒失败: %s (%s) - %s', client_ip, device_name, mac, error)
+            result['error'] = error
+        else:
+            logger.info('[%s] 执行唤醒: %s (%s) -> %s:%s', client_ip, device_name, mac, broadcast_ip, port)
+            result['ok'] = True
+
+    failed = [r for r in results if 'error' in r]
+    sent = len(results) - len(failed)
+    logger.info('[%s] 批量唤醒完成: %d/%d 台成功', client_ip, sent, len(results))
+    return _json({'ok': not failed, 'sent': sent, 'failed': failed, 'results': results})
 
 
 @app.route('/api/check', methods=['POST'])
 def check_device():
-    """Check if a device is online by testing port 3389."""
-    data = request.get_json(force=True) or {}
+    """Check if a device is online (ping or port 3389), or test an explicit port."""
+    data = _read_json()
     ip = data.get('ip', '')
-    port = int(data.get('port') or 3389)
+    port = data.get('port')
     timeout = float(data.get('timeout') or 1.0)
     client_ip = request.remote_addr
     
     if not ip:
-        return jsonify({'error': 'IP 地址不能为空'}), 400
+        return _json({'error': 'IP 地址不能为空'}, 400)
     
-    result = check_port(ip, port, timeout)
+    result = check_port(ip, int(port), timeout) if port else probe_host(ip, timeout)
     status = '在线' if result['online'] else '离线'
-    logger.info(f'[{client_ip}] 检测设备: {ip} - {status}')
-    return jsonify(result)
-
-
-def check_device_worker(device):
-    """Worker function to check a single device."""
-    ip = device.get('ip')
-    mac = device.get('mac')
-    
-    if ip:
-        status = check_port(ip, 3389, 1.0)
-        return {
-            'mac': mac,
-            'online': status['online'],
-            'latency': status['latency']
-        }
-    else:
-        return {
-            'mac': mac,
-            'online': False,
-            'latency': None
-        }
+    logger.info('[%s] 检测设备: %s - %s', client_ip, ip, status)
+    return _json(result)
 
 
 @app.route('/api/check_all', methods=['GET'])
 def check_all_devices():
-    """Check online status for all devices using thread pool."""
+    """Check online status for all devices concurrently with asyncio."""
     devices = load_devices()
-    results = []
     client_ip = request.remote_addr
-    
-    # Use ThreadPoolExecutor for concurrent checking (max 10 workers)
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        # Submit all tasks
-        future_to_device = {executor.submit(check_device_worker, device): device for device in devices}
-        
-        # Collect results as they complete
-        for future in as_completed(future_to_device):
-            try:
-                result = future.result()
-                results.append(result)
-            except Exception as e:
-                device = future_to_device[future]
-                results.append({
-                    'mac': device.get('mac'),
-                    'online': False,
-                    'latency': None
-                })
+    results = probe_all(devices)
     
     online_count = sum(1 for r in results if r['online'])
-    logger.info(f'[{client_ip}] 批量检测完成: {online_count}/{len(results)} 台在线')
-    return jsonify(results)
+    logger.info('[%s] 批量检测完成: %d/%d 台在线', client_ip, online_count, len(results))
+    return _json(results)
+
+
+@app.route('/api/check_all_stream')
+def check_all_stream():
+    """Like check_all, but as Server-Sent Events in completion order."""
+    devices = load_devices()
+    client_ip = request.remote_addr
+    results = queue.Queue()
+    asyncio.run_coroutine_threadsafe(_probe_stream(devices, results), _PROBE_LOOP)
+
+    def events():
+        online_count = total = 0
+        while True:
+            result = results.get()
+            if result is None or isinstance(result, BaseException):
+                break
+            online_count += result['online']
+            total += 1
+            yield b'data: ' + orjson.dumps(result) + b'\n\n'
+        # Either event tells the client to close; EventSource would otherwise reconnect
+        if result is not None:
+            logger.error('[%s] 批量检测中断: %d/%d 台已返回 - %s', client_ip, total, len(devices), result)
+            yield b'event: failed\ndata: ' + orjson.dumps({'error': str(result)}) + b'\n\n'
+            return
+        logger.info('[%s] 批量检测完成: %d/%d 台在线', client_ip, online_count, total)
+        yield b'event: done\ndata: {}\n\n'
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
 @app.route('/api/rdp', methods=['POST'])
 def open_rdp():
     """Open Remote Desktop Connection to specified IP."""
-    data = request.get_json(force=True) or {}
+    data = _read_json()
     ip = data.get('ip', '')
     
     if not ip:
-        return jsonify({'error': 'IP 地址不能为空'}), 400
+        return _json({'error': 'IP 地址不能为空'}, 400)
     
     try:
         import subprocess
-        import platform
         
-        system = platform.system()
+        system = PLATFORM
         
         if system == 'Windows':
             # Windows: 使用 mstsc 命令
@@ -872,37 +896,40 @@ def open_rdp():
                 try:
                     subprocess.Popen(['rdesktop', f'{ip}:3389'])
                 except FileNotFoundError:
-                    return jsonify({'error': '未找到远程桌面客户端'}), 500
+                    return _json({'error': '未找到远程桌面客户端'}, 500)
         
-        return jsonify({'ok': True})
+        return _json({'ok': True})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 # -------------------- Windows Autostart --------------------
 
-def is_windows():
-    """Check if running on Windows."""
-    return sys.platform == 'win32'
+_RUN_KEY = r'Software\Microsoft\Windows\CurrentVersion\Run'
+# Command stored under the Run key (computed at import, while cwd is still the launch dir)
+AUTOSTART_CMD = f'"{sys.executable if IS_FROZEN else os.path.abspath(__file__)}"'
+
+# Last known autostart state; we are the only writer of the Run value, so the
+# registry is read once and the cache is updated by set_autostart()
+_autostart_cache = None
 
 
 def get_autostart_status():
     """Check if autostart is enabled."""
-    if not is_windows():
+    global _autostart_cache
+    if not _HAS_WINREG:
         return False
+    if _autostart_cache is not None:
+        return _autostart_cache
     
     try:
-        import winreg
-        key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, 
-                            r'Software\Microsoft\Windows\CurrentVersion\Run',
-                            0, winreg.KEY_READ)
-        try:
-            winreg.QueryValueEx(key, 'WOL_Tool')
-            winreg.CloseKey(key)
-            return True
-        except FileNotFoundError:
-            winreg.CloseKey(key)
-            return False
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, _RUN_KEY, 0, winreg.KEY_READ) as key:
+            try:
+                winreg.QueryValueEx(key, 'WOL_Tool')
+                _autostart_cache = True
+            except FileNotFoundError:
+                _autostart_cache = False
+        return _autostart_cache
     except Exception as e:
         logger.error(f'检查开机自启状态失败: {e}')
         return False
@@ -910,29 +937,26 @@ def get_autostart_status():
 
 def set_autostart(enable=True):
     """Enable or disable autostart."""
-    if not is_windows():
+    global _autostart_cache
+    if not _HAS_WINREG:
         return False
     
     try:
-        import winreg
-        key = winreg.OpenKey(winreg.HKEY_CURRENT_USER,
-                            r'Software\Microsoft\Windows\CurrentVersion\Run',
-                            0, winreg.KEY_SET_VALUE)
-        
-        if enable:
-            exe_path = sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(__file__)
-            winreg.SetValueEx(key, 'WOL_Tool', 0, winreg.REG_SZ, f'"{exe_path}"')
-            logger.info('已启用开机自启')
-        else:
-            try:
-                winreg.DeleteValue(key, 'WOL_Tool')
-                logger.info('已禁用开机自启')
-            except FileNotFoundError:
-                pass
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, _RUN_KEY, 0, winreg.KEY_SET_VALUE) as key:
+            if enable:
+                winreg.SetValueEx(key, 'WOL_Tool', 0, winreg.REG_SZ, AUTOSTART_CMD)
+                logger.info('已启用开机自启')
+            else:
+                try:
+                    winreg.DeleteValue(key, 'WOL_Tool')
+                    logger.info('已禁用开机自启')
+                except FileNotFoundError:
+                    pass
         
-        winreg.CloseKey(key)
+        _autostart_cache = bool(enable)
         return True
     except Exception as e:
+        _autostart_cache = None  # unknown now; re-read next time
         logger.error(f'设置开机自启失败: {e}')
         return False
 
@@ -940,23 +964,22 @@ def set_autostart(enable=True):
 @app.route('/api/rdp', methods=['POST'])
 def open_rdp_connection():
     """Open Remote Desktop Connection (only for local access)."""
-    data = request.get_json(force=True) or {}
+    data = _read_json()
     ip = data.get('ip', '')
     client_ip = request.remote_addr
     
     # Check if request is from localhost
     if client_ip not in ['127.0.0.1', '::1', 'localhost']:
         logger.warning(f'[{client_ip}] 尝试远程调用RDP被拒绝')
-        return jsonify({'error': '远程桌面功能仅限本地访问'}), 403
+        return _json({'error': '远程桌面功能仅限本地访问'}, 403)
     
     if not ip:
-        return jsonify({'error': 'IP 地址不能为空'}), 400
+        return _json({'error': 'IP 地址不能为空'}, 400)
     
     try:
         import subprocess
-        import platform
         
-        system = platform.system()
+        system = PLATFORM
         
         if system == 'Windows':
             # Windows: 使用 mstsc 命令
@@ -977,80 +1000,153 @@ def open_rdp_connection():
                     logger.info(f'[{client_ip}] 打开远程桌面: {ip}')
                 except FileNotFoundError:
                     logger.error(f'[{client_ip}] 未找到远程桌面客户端')
-                    return jsonify({'error': '未找到远程桌面客户端'}), 500
+                    return _json({'error': '未找到远程桌面客户端'}, 500)
         
-        return jsonify({'ok': True})
+        return _json({'ok': True})
     except Exception as e:
         logger.error(f'[{client_ip}] 打开远程桌面失败: {ip} - {e}')
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
 
 
 @app.route('/api/autostart', methods=['GET'])
 def get_autostart():
     """Get autostart status."""
-    return jsonify({'enabled': get_autostart_status()})
+    return _json({'enabled': get_autostart_status()})
 
 
 @app.route('/api/autostart', methods=['POST'])
 def toggle_autostart():
     """Toggle autostart."""
-    data = request.get_json(force=True) or {}
+    data = _read_json()
     enable = data.get('enable', True)
     client_ip = request.remote_addr
     success = set_autostart(enable)
     status = '启用' if enable else '禁用'
     logger.info(f'[{client_ip}] {status}开机自启')
-    return jsonify({'ok': success, 'enabled': get_autostart_status()})
+    # On success the new state is known; only a failed write needs a re-read
+    return _json({'ok': success, 'enabled': bool(enable) if success else get_autostart_status()})
+
+
+def tail_lines(path: str, n: int) -> str:
+    """Return the last n lines of path.
+
+    The file is memory-mapped and scanned backwards for newlines, so only the
+    pages holding the tail are touched. Bytes are decoded once at the end.
+    """
+    if n <= 0:
+        return ''
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ''  # mmap can't map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = len(mm)
+            # A trailing newline ends the last line rather than starting one
+            pos = end - 1 if mm[end - 1] == 0x0A else end
+            for _ in range(n):
+                pos = mm.rfind(b'\n', 0, pos)
+                if pos < 0:
+                    break
+            return mm[pos + 1:end].decode('utf-8', 'replace')
+
+
+def _etag_matches(etag: str) -> bool:
+    """Weak If-None-Match check that also accepts Flask-Compress's variants.
+
+    Flask-Compress sends compressed bodies with the ETag rewritten to
+    "<tag>:gzip" (or :br/:deflate), and that is what the client echoes back.
+    """
+    sent = request.if_none_match
+    if sent.star_tag:
+        return True
+    for tag in sent.as_set(include_weak=True):
+        base, _, suffix = tag.rpartition(':')
+        if tag == etag or (suffix in ('gzip', 'br', 'deflate') and base == etag):
+            return True
+    return False
+
+
+_LOG_CACHE_TTL = 0.5  # seconds
+# Last computed tail, shared by all pollers: {(lines, size, mtime_ns): (monotonic time, JSON body)}
+_log_cache = {}
 
 
 @app.route('/api/logs', methods=['GET'])
 def get_logs():
-    """Get log file content."""
+    """Get log file content; 304 while the log hasn't changed since the client's copy."""
+    global _log_cache
     try:
         lines = int(request.args.get('lines', 100))
-        if os.path.exists(LOG_FILE):
-            with open(LOG_FILE, 'r', encoding='utf-8') as f:
-                content = f.readlines()
-                return jsonify({'logs': ''.join(content[-lines:])})
-        return jsonify({'logs': '日志文件不存在'})
+        try:
+            st = os.stat(LOG_FILE)
+        except FileNotFoundError:
+            return _json({'logs': '日志文件不存在'})
+        etag = f'{st.st_size:x}-{st.st_mtime_ns:x}'
+        if _etag_matches(etag):
+            response = Response(status=304)
+        else:
+            key = (lines, st.st_size, st.st_mtime_ns)
+            now = time.monotonic()
+            cached = _log_cache.get(key)
+            if cached and now - cached[0] < _LOG_CACHE_TTL:
+                body = cached[1]
+            else:
+                body = orjson.dumps({'logs': tail_lines(LOG_FILE, lines)})
+                _log_cache = {key: (now, body)}
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'  # always revalidate
+        return response
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}, 500)
+
+
+def serve_app(port, on_listening=None):
+    """Serve app with waitress, a multi-threaded production WSGI server.
+
+    on_listening() is called once the socket is bound and listening, just
+    before the accept loop starts.
+    """
+    from waitress import create_server
+    server = create_server(app, host='0.0.0.0', port=port, threads=8)
+    if on_listening:
+        on_listening()
+    server.run()
 
 
 # -------------------- System Tray --------------------
 
+@functools.lru_cache(maxsize=1)
+def _tray_image():
+    """Draw the 64x64 tray icon once."""
+    image = Image.new('RGB', (64, 64), color='#22c55e')
+    dc = ImageDraw.Draw(image)
+    dc.rectangle([16, 16, 48, 48], fill='#0f172a', outline='#22c55e', width=2)
+    return image
+
+
 class TrayApp:
     def __init__(self, port=5050):
         self.port = port
         self.icon = None
-        self.flask_thread = None
         
     def create_icon(self):
-        """Create system tray icon."""
-        try:
-            from PIL import Image, ImageDraw
-            import pystray
-            
-            # Create a simple icon
-            width = 64
-            height = 64
-            image = Image.new('RGB', (width, height), color='#22c55e')
-            dc = ImageDraw.Draw(image)
-            dc.rectangle([16, 16, 48, 48], fill='#0f172a', outline='#22c55e', width=2)
-            
-            menu = pystray.Menu(
-                pystray.MenuItem('打开界面', self.open_browser),
-                pystray.MenuItem('切换开机自启', self.toggle_autostart),
-                pystray.MenuItem('查看日志', self.open_log),
-                pystray.Menu.SEPARATOR,
-                pystray.MenuItem('退出', self.quit_app)
-            )
-            
-            self.icon = pystray.Icon('WOL_Tool', image, 'WOL 唤醒工具', menu)
+        """Create system tray icon (once; later calls return the same Icon)."""
+        if self.icon is not None:
             return self.icon
-        except ImportError:
+        if not _HAS_PYSTRAY:
             logger.warning('pystray 未安装，系统托盘功能不可用')
             return None
+        
+        menu = pystray.Menu(
+            pystray.MenuItem('打开界面', self.open_browser),
+            pystray.MenuItem('切换开机自启', self.toggle_autostart),
+            pystray.MenuItem('查看日志', self.open_log),
+            pystray.Menu.SEPARATOR,
+            pystray.MenuItem('退出', self.quit_app)
+        )
+        
+        self.icon = pystray.Icon('WOL_Tool', _tray_image(), 'WOL 唤醒工具', menu)
+        return self.icon
     
     def open_browser(self, icon=None, item=None):
         """Open web interface in browser."""
@@ -1066,44 +1162,47 @@ class TrayApp:
     
     def open_log(self, icon=None, item=None):
         """Open log file."""
-        if os.path.exists(LOG_FILE):
-            if is_windows():
+        if IS_WINDOWS:
+            # startfile() reports a missing file itself
+            try:
                 os.startfile(LOG_FILE)
-            else:
-                webbrowser.open(f'file://{LOG_FILE}')
-            logger.info('打开日志文件')
+            except FileNotFoundError:
+                logger.info('日志文件不存在')
+                return
+        elif os.path.exists(LOG_FILE):
+            webbrowser.open(f'file://{LOG_FILE}')
+        else:
+            logger.info('日志文件不存在')
+            return
+        logger.info('打开日志文件')
     
     def quit_app(self, icon=None, item=None):
         """Quit application."""
         logger.info('退出应用')
+        flush_devices()
         if self.icon:
             self.icon.stop()
         os._exit(0)
     
-    def run_flask(self):
-        """Run Flask in a separate thread."""
-        debug = not getattr(sys, 'frozen', False)
-        app.run(host='0.0.0.0', port=self.port, debug=False, use_reloader=False)
+    def run_flask(self, on_listening=None):
+        """Run the web server (waitress) in the calling thread."""
+        serve_app(self.port, on_listening)
     
     def start(self):
         """Start the application."""
-        # Start Flask in background thread
-        self.flask_thread = threading.Thread(target=self.run_flask, daemon=True)
-        self.flask_thread.start()
-        logger.info(f'Flask服务已启动: http://localhost:{self.port}')
-        
-        # Create and run system tray
+        # The tray runs its own message loop thread; the web server keeps the
+        # main thread, so tray idling never sits between requests and the GIL
         icon = self.create_icon()
         if icon:
+            icon.run_detached()
             logger.info('系统托盘已启动')
-            # Auto open browser on first start
-            threading.Timer(1.5, self.open_browser).start()
-            icon.run()
         else:
-            # Fallback: run Flask in main thread
             logger.info('以无托盘模式运行')
-            self.open_browser()
-            self.run_flask()
+        logger.info(f'Flask服务已启动: http://localhost:{self.port}')
+        # Auto open browser on first start. The socket is already listening by
+        # then, so the page request just waits in the backlog until accept()
+        # starts; no fixed delay or timer thread needed
+        self.run_flask(on_listening=self.open_browser)
 
 
 if __name__ == '__main__':
@@ -1111,12 +1210,15 @@ if __name__ == '__main__':
     logger.info('=== WOL 唤醒工具启动 ===')
     
     # Check if running with system tray support
-    if is_windows() and getattr(sys, 'frozen', False):
+    if IS_WINDOWS and IS_FROZEN:
         # Running as packaged exe on Windows - use tray
         tray_app = TrayApp(port)
         tray_app.start()
+    elif IS_FROZEN:
+        # Packaged build without tray - serve with waitress (multi-threaded WSGI)
+        logger.info(f'服务启动: http://localhost:{port}')
+        serve_app(port)
     else:
-        # Running in development mode or non-Windows
-        debug = not getattr(sys, 'frozen', False)
+        # Running in development mode
         logger.info(f'开发模式启动: http://localhost:{port}')
-        app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
+        app.run(host='0.0.0.0', port=port, debug=True, threaded=True)
\ No newline at end of file
@@ -0,0 +1,483 @@
+const api = {
+  add: (d) => fetch('/api/devices', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(d)}).then(r=>r.json()),
+  del: (mac) => fetch('/api/devices/' + encodeURIComponent(mac), {method:'DELETE'}).then(r=>r.json()),
+  wake: (mac, port) => fetch('/api/wake', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({mac, port})}).then(r=>r.json()),
+  wakeBatch: (macs, port) => fetch('/api/wake_batch', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({macs, port})}).then(r=>r.json()),
+  state: (q, signal) => fetch('/api/state?q=' + encodeURIComponent(q), {signal}).then(r=>r.json()),
+  checkAllStream: () => new EventSource('/api/check_all_stream'),
+  checkOne: (ip) => fetch('/api/check', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({ip})}).then(r=>r.json()),
+  rdp: (ip) => fetch('/api/rdp', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({ip})}).then(r=>r.json()),
+  getAutostart: () => fetch('/api/autostart').then(r=>r.json()),
+  setAutostart: (enable) => fetch('/api/autostart', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({enable})}).then(r=>r.json()),
+  getLogs: (lines) => fetch('/api/logs?lines=' + (lines || 100)).then(r=>r.json()),
+};
+
+let filtered = [];
+let refreshController = null; // 取消尚未完成的刷新请求
+let deviceStatus = {};
+let monitorInterval = null;
+let checkSource = null; // 进行中的批量检测（SSE）
+let renderPending = false;
+let isMonitoring = false;
+let sortOrder = 'desc'; // null, 'asc', 'desc' - 默认离线在前
+let isLocalAccess = false; // 是否本地访问
+
+function render(list){
+  const frag = document.createDocumentFragment();
+  list.forEach(d => {
+    const status = deviceStatus[d.mac] || {online: false, latency: null};
+    const tr = document.createElement('tr');
+
+    const chk = document.createElement('input');
+    chk.className = 'checkbox';
+    chk.type = 'checkbox';
+    chk.dataset.mac = d.mac;
+
+    let statusEl;
+    if(d.ip){
+      statusEl = renderStatus(status);
+    } else {
+      statusEl = document.createElement('span');
+      statusEl.style.cssText = 'color:var(--muted); font-size:12px;';
+      statusEl.textContent = '无IP';
+    }
+
+    const actions = document.createElement('td');
+    actions.className = 'actions';
+    if(d.ip) actions.appendChild(makeButton('secondary', 'check', '检测', {mac: d.mac, ip: d.ip}));
+    // 只有本地访问才显示远程按钮
+    if(d.ip && isLocalAccess) actions.appendChild(makeButton('success', 'rdp', '远程', {ip: d.ip}));
+    actions.appendChild(makeButton('secondary', 'wake', '唤醒', {mac: d.mac}));
+    actions.appendChild(makeButton('danger', 'del', '删除', {mac: d.mac}));
+
+    tr.append(
+      makeCell(chk),
+      makeCell(statusEl),
+      makeCell(d.remark || ''),
+      makeCell(d.mac),
+      makeCell(d.ip || ''),
+      makeCell(d.broadcast_ip || ''),
+      actions
+    );
+    frag.appendChild(tr);
+  });
+  document.getElementById('tbody').replaceChildren(frag);
+}
+
+// 文本通过 textContent 写入，无需转义
+function makeCell(content){
+  const td = document.createElement('td');
+  if(typeof content === 'string'){ td.textContent = content; } else { td.appendChild(content); }
+  return td;
+}
+
+function makeButton(className, action, text, data){
+  const btn = document.createElement('button');
+  btn.className = className;
+  btn.textContent = text;
+  btn.dataset.action = action;
+  Object.assign(btn.dataset, data);
+  return btn;
+}
+
+function renderStatus(status){
+  const wrap = document.createElement('div');
+  wrap.className = 'status-indicator';
+  const dot = document.createElement('span');
+  dot.className = 'status-dot ' + (status.online ? 'online' : 'offline');
+  const label = document.createElement('span');
+  label.textContent = status.online ? '在线' : '离线';
+  wrap.append(dot, label);
+  if(status.online){
+    const latency = document.createElement('span');
+    latency.className = 'latency ' + (status.latency < 50 ? 'good' : status.latency < 150 ? 'medium' : 'bad');
+    latency.textContent = status.latency + 'ms';
+    wrap.appendChild(latency);
+  }
+  return wrap;
+}
+
+async function refresh(){
+  if(refreshController) refreshController.abort();
+  const controller = refreshController = new AbortController();
+  const q = document.getElementById('search').value.trim();
+  try {
+    const state = await api.state(q, controller.signal);
+    filtered = state.devices;
+  } catch(e) {
+    if(e.name === 'AbortError') return;
+    throw e;
+  }
+  applySortAndRender();
+}
+
+function applySortAndRender(){
+  let toRender = [...filtered];
+  
+  if(sortOrder === 'asc'){
+    // 在线的在上面
+    toRender.sort((a, b) => {
+      const statusA = deviceStatus[a.mac] || {online: false};
+      const statusB = deviceStatus[b.mac] || {online: false};
+      if(statusA.online && !statusB.online) return -1;
+      if(!statusA.online && statusB.online) return 1;
+      return 0;
+    });
+  } else if(sortOrder === 'desc'){
+    // 离线的在上面
+    toRender.sort((a, b) => {
+      const statusA = deviceStatus[a.mac] || {online: false};
+      const statusB = deviceStatus[b.mac] || {online: false};
+      if(!statusA.online && statusB.online) return -1;
+      if(statusA.online && !statusB.online) return 1;
+      return 0;
+    });
+  }
+  
+  render(toRender);
+  updateSortIndicator();
+}
+
+function updateSortIndicator(){
+  const sortBtn = document.getElementById('sortStatus');
+  sortBtn.classList.remove('asc', 'desc');
+  if(sortOrder === 'asc'){
+    sortBtn.classList.add('asc');
+  } else if(sortOrder === 'desc'){
+    sortBtn.classList.add('desc');
+  }
+}
+
+// 同一帧内到达的多条检测结果只重绘一次
+function scheduleRender(){
+  if(renderPending) return;
+  renderPending = true;
+  requestAnimationFrame(() => {
+    renderPending = false;
+    applySortAndRender();
+  });
+}
+
+function checkAllDevices(){
+  if(checkSource) return; // 上一轮还没结束
+  const source = checkSource = api.checkAllStream();
+  // 每台设备检测完成即推送一条结果
+  source.onmessage = (e) => {
+    const r = JSON.parse(e.data);
+    deviceStatus[r.mac] = {online: r.online, latency: r.latency};
+    scheduleRender();
+  };
+  source.addEventListener('done', () => {
+    source.close();
+    checkSource = null;
+    updateMonitorStatus('最后检测: ' + new Date().toLocaleTimeString());
+  });
+  // 服务端检测中途失败：结果不完整，不更新“最后检测”时间
+  source.addEventListener('failed', (e) => {
+    source.close();
+    checkSource = null;
+    updateMonitorStatus('检测失败: ' + JSON.parse(e.data).error);
+  });
+  source.onerror = () => {
+    source.close();
+    checkSource = null;
+    console.error('检测失败');
+  };
+}
+
+async function checkSingleDevice(mac, ip){
+  try {
+    const result = await api.checkOne(ip);
+    deviceStatus[mac] = {online: result.online, latency: result.latency};
+    applySortAndRender();
+  } catch(e) {
+    console.error('检测失败:', e);
+  }
+}
+
+async function openRDP(ip){
+  try {
+    const res = await api.rdp(ip);
+    if(res.error){
+      alert('打开远程桌面失败: ' + res.error);
+    }
+  } catch(e) {
+    alert('打开远程桌面失败: ' + e.message);
+  }
+}
+
+function checkLocalAccess(){
+  const hostname = window.location.hostname;
+  isLocalAccess = hostname === 'localhost' || hostname === '127.0.0.1' || hostname === '::1';
+}
+
+function startMonitoring(){
+  if(monitorInterval) return;
+  const interval = parseInt(document.getElementById('monitorInterval').value) * 1000;
+  isMonitoring = true;
+  saveMonitorSettings();
+  checkAllDevices();
+  monitorInterval = setInterval(checkAllDevices, interval);
+  updateMonitorStatus('监控中...');
+}
+
+function stopMonitoring(){
+  if(monitorInterval){
+    clearInterval(monitorInterval);
+    monitorInterval = null;
+  }
+  isMonitoring = false;
+  saveMonitorSettings();
+  updateMonitorStatus('已停止');
+}
+
+function updateMonitorStatus(text){
+  document.getElementById('monitorStatus').textContent = text;
+}
+
+function saveMonitorSettings(){
+  const settings = {
+    enabled: isMonitoring,
+    interval: document.getElementById('monitorInterval').value
+  };
+  localStorage.setItem('monitorSettings', JSON.stringify(settings));
+}
+
+function loadMonitorSettings(){
+  try {
+    const saved = localStorage.getItem('monitorSettings');
+    if(saved){
+      const settings = JSON.parse(saved);
+      document.getElementById('monitorInterval').value = settings.interval || '60';
+      if(settings.enabled){
+        document.getElementById('monitorToggle').checked = true;
+        startMonitoring();
+      }
+    }
+  } catch(e) {
+    console.error('加载设置失败:', e);
+  }
+}
+
+async function loadAutostartStatus(){
+  try {
+    const res = await api.getAutostart();
+    if(res.enabled !== undefined){
+      // Show autostart controls (Windows only)
+      document.getElementById('autostartLabel').style.display = 'flex';
+      document.getElementById('autostartToggle').checked = res.enabled;
+    }
+  } catch(e) {
+    // Not on Windows or API not available
+    console.log('开机自启功能不可用');
+  }
+}
+
+async function checkLogsAvailable(){
+  try {
+    const res = await api.getLogs(1);
+    if(res.logs || res.error){
+      document.getElementById('viewLogs').style.display = 'block';
+    }
+  } catch(e) {
+    console.log('日志功能不可用');
+  }
+}
+
+function showLogsModal(){
+  const modal = document.createElement('div');
+  modal.style.cssText = 'position:fixed; top:0; left:0; right:0; bottom:0; background:rgba(0,0,0,0.8); display:flex; align-items:center; justify-content:center; z-index:9999;';
+  
+  const content = document.createElement('div');
+  content.style.cssText = 'background:var(--panel); border:1px solid var(--border); border-radius:12px; padding:24px; max-width:800px; width:90%; max-height:80vh; display:flex; flex-direction:column;';
+  
+  const title = document.createElement('h3');
+  title.textContent = '系统日志';
+  title.style.cssText = 'margin:0 0 16px 0; color:var(--text);';
+  
+  const logArea = document.createElement('pre');
+  logArea.style.cssText = 'flex:1; overflow:auto; background:#0b1220; border:1px solid var(--border); border-radius:8px; padding:12px; color:var(--text); font-size:12px; line-height:1.5; margin:0;';
+  logArea.textContent = '加载中...';
+  
+  const closeBtn = document.createElement('button');
+  closeBtn.textContent = '关闭';
+  closeBtn.className = 'secondary';
+  closeBtn.style.cssText = 'margin-top:16px; align-self:flex-end;';
+  closeBtn.onclick = () => document.body.removeChild(modal);
+  
+  content.appendChild(title);
+  content.appendChild(logArea);
+  content.appendChild(closeBtn);
+  modal.appendChild(content);
+  document.body.appendChild(modal);
+  
+  // Load logs
+  api.getLogs(200).then(res => {
+    if(res.logs){
+      logArea.textContent = res.logs;
+      logArea.scrollTop = logArea.scrollHeight;
+    } else if(res.error){
+      logArea.textContent = '加载日志失败: ' + res.error;
+    }
+  });
+  
+  modal.onclick = (e) => {
+    if(e.target === modal) document.body.removeChild(modal);
+  };
+}
+
+function bindEvents(){
+  document.getElementById('refresh').addEventListener('click', refresh);
+  
+  document.getElementById('sortStatus').addEventListener('click', () => {
+    if(sortOrder === null){
+      sortOrder = 'asc'; // 第一次点击：在线在上
+    } else if(sortOrder === 'asc'){
+      sortOrder = 'desc'; // 第二次点击：离线在上
+    } else {
+      sortOrder = null; // 第三次点击：取消排序
+    }
+    applySortAndRender();
+  });
+  
+  document.getElementById('monitorToggle').addEventListener('change', (e) => {
+    if(e.target.checked){
+      startMonitoring();
+    } else {
+      stopMonitoring();
+    }
+  });
+  
+  document.getElementById('monitorInterval').addEventListener('change', () => {
+    saveMonitorSettings();
+    if(isMonitoring){
+      stopMonitoring();
+      startMonitoring();
+    }
+  });
+  
+  document.getElementById('checkNow').addEventListener('click', checkAllDevices);
+  
+  document.getElementById('autostartToggle').addEventListener('change', async (e) => {
+    const res = await api.setAutostart(e.target.checked);
+    if(res.ok){
+      console.log('开机自启已' + (res.enabled ? '启用' : '禁用'));
+    }
+  });
+  
+  document.getElementById('viewLogs').addEventListener('click', showLogsModal);
+  
+  document.getElementById('add').addEventListener('click', async () => {
+    const mac = document.getElementById('mac').value.trim();
+    const ip = document.getElementById('ip').value.trim();
+    const remark = document.getElementById('remark').value.trim();
+    const broadcast_ip = document.getElementById('broadcast_ip').value.trim();
+    if(!mac){ alert('请填写 MAC 地址'); return; }
+    const res = await api.add({mac, ip: ip || undefined, remark: remark || undefined, broadcast_ip: broadcast_ip || undefined});
+    if(res.error){ alert(res.error); } else {
+      document.getElementById('mac').value='';
+      document.getElementById('ip').value='';
+      document.getElementById('remark').value='';
+      document.getElementById('broadcast_ip').value='';
+      refresh();
+    }
+  });
+  
+  document.getElementById('search').addEventListener('input', debounce(refresh, 200));
+  
+  document.getElementById('tbody').addEventListener('click', async (e) => {
+    const btn = e.target.closest('button');
+    if(!btn) return;
+    const mac = btn.getAttribute('data-mac');
+    const action = btn.getAttribute('data-action');
+    if(action === 'rdp'){
+      const ip = btn.getAttribute('data-ip');
+      openRDP(ip);
+    } else if(action === 'check'){
+      const ip = btn.getAttribute('data-ip');
+      btn.disabled = true;
+      btn.textContent = '检测中...';
+      await checkSingleDevice(mac, ip);
+      btn.disabled = false;
+      btn.textContent = '检测';
+    } else if(action === 'wake'){
+      btn.disabled = true;
+      const originalText = btn.textContent;
+      btn.textContent = '发送中...';
+      try {
+        const res = await api.wake(mac);
+        if(res.error){ 
+          alert(res.error); 
+        } else { 
+          btn.textContent = '已发送';
+          setTimeout(() => { btn.textContent = originalText; btn.disabled = false; }, 1500);
+        }
+      } catch(e) {
+        alert('唤醒失败: ' + e.message);
+        btn.textContent = originalText;
+        btn.disabled = false;
+      }
+      if(btn.textContent === '发送中...') {
+        btn.textContent = originalText;
+        btn.disabled = false;
+      }
+    } else if(action === 'del'){
+      if(confirm('确定删除该设备？')){
+        const res = await api.del(mac);
+        if(res.error){ alert(res.error); } else { refresh(); }
+      }
+    }
+  });
+  
+  document.getElementById('checkAll').addEventListener('change', (e) => {
+    document.querySelectorAll('#tbody .checkbox').forEach(chk => chk.checked = e.target.checked);
+  });
+  
+  document.getElementById('wakeSelected').addEventListener('click', async () => {
+    const chks = Array.from(document.querySelectorAll('#tbody .checkbox')).filter(c => c.checked);
+    if(chks.length === 0){ alert('请先选择设备'); return; }
+    
+    const btn = document.getElementById('wakeSelected');
+    btn.disabled = true;
+    btn.textContent = '发送中...';
+    
+    let successCount = 0;
+    let failCount = 0;
+    const errors = [];
+    const macs = chks.map(c => c.getAttribute('data-mac'));
+    
+    try {
+      const res = await api.wakeBatch(macs);
+      successCount = res.sent || 0;
+      (res.failed || []).forEach(r => {
+        failCount++;
+        errors.push(`${r.mac}: ${r.error}`);
+      });
+    } catch(e) {
+      failCount = macs.length;
+      errors.push(e.message);
+    }
+    
+    btn.disabled = false;
+    btn.textContent = '唤醒选中';
+    
+    if(failCount > 0){
+      alert(`批量唤醒完成\n成功: ${successCount}台\n失败: ${failCount}台\n\n错误详情:\n${errors.join('\n')}`);
+    } else {
+      alert(`已成功发送 ${successCount} 台设备的唤醒数据包`);
+    }
+  });
+}
+
+function debounce(fn, delay){
+  let t; return (...args) => { clearTimeout(t); t = setTimeout(() => fn.apply(null, args), delay); };
+}
+
+(async function init(){ 
+  checkLocalAccess();
+  bindEvents(); 
+  await refresh(); 
+  loadMonitorSettings();
+  loadAutostartStatus();
+  checkLogsAvailable();
+})();
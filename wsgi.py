@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""WSGI entry point for production servers.
+
+Example (Linux/macOS):
+    gunicorn -k gthread -w 1 --threads 32 -b 0.0.0.0:5050 wsgi:app
+
+Keep a single worker process: the device cache and its coalesced writes to
+devices.json live in process memory.
+"""
+
+from app import app  # noqa: F401